@@ -1,6 +1,19 @@
 import os
+import re
+import sys
+import errno
 import shutil
-import json
+import subprocess
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import json_utils
+
+try:
+    import ijson  # 可选依赖：流式解析 JSON，只保留目标笔记的标注，降低内存峰值
+except ImportError:
+    ijson = None
 
 # ================= 配置区域 =================
 # 在这里填写需要添加到 final 数据集的笔记 ID (文件夹名)
@@ -33,8 +46,188 @@ DST_DATA_DIR = os.path.join(BASE_DIR, 'data_final')
 DST_IMAGE_DIR = os.path.join(DST_DATA_DIR, 'image')
 DST_ANNOTATIONS_FILE = os.path.join(DST_DATA_DIR, 'annotations.json')
 
+# 标注路径开头的 data 目录 (同时兼容 \ 和 / 两种分隔符)，替换为 data_final
+_DATA_DIR_RE = re.compile(r'^data([\\/])')
+
+# 并行复制图片时使用的线程数 (I/O 密集型，线程在系统调用中会释放 GIL)
+COPY_WORKERS = 16
+
+# 单个文件复制时的缓冲区大小 (1 MiB，相比默认的小缓冲区大幅减少系统调用次数)
+COPY_BUFFER_SIZE = 1 << 20
+
 # ===========================================
 
+# 每个复制线程各自持有一块复用的缓冲区，避免多线程共享同一块内存
+_thread_local = threading.local()
+
+def _fast_copy(src, dst):
+    """
+    复制单个文件，并保留源文件的修改时间 (供 _sync_dir 判断文件是否变化)。
+
+    Linux 下优先使用 os.copy_file_range 在内核中完成复制 (Btrfs/XFS 上可触发 reflink，
+    NFS 上为服务端复制)；不支持时回退到 1 MiB 缓冲区的 readinto 循环。
+    """
+    with open(src, 'rb', buffering=0) as fsrc, open(dst, 'wb') as fdst:
+        src_stat = os.fstat(fsrc.fileno())
+        copied = False
+        if hasattr(os, 'copy_file_range'):
+            try:
+                # 每次调用最多复制 1 GiB，返回 0 表示已到文件末尾
+                total = 0
+                while True:
+                    n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), 1 << 30)
+                    if not n:
+                        break
+                    total += n
+                # 部分 FUSE/overlay 文件系统与伪文件会直接返回 0 而不复制任何内容，
+                # 复制量不足源文件大小时视为不支持
+                copied = total >= src_stat.st_size
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                    raise
+            if not copied:
+                # 从头改用普通读写
+                fsrc.seek(0)
+                fdst.seek(0)
+                fdst.truncate()
+
+        if not copied:
+            buf = getattr(_thread_local, 'buf', None)
+            if buf is None:
+                buf = _thread_local.buf = memoryview(bytearray(COPY_BUFFER_SIZE))
+            while True:
+                n = fsrc.readinto(buf)
+                if not n:
+                    break
+                fdst.write(buf[:n])
+
+    os.utime(dst, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+
+def _run_copy_jobs(copy_jobs, workers=COPY_WORKERS):
+    """通过线程池并发执行 (src, dst) 复制任务"""
+    if not copy_jobs:
+        return
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_fast_copy, s, d) for s, d in copy_jobs]
+        # 逐个取结果，让任一复制失败的异常向上抛出
+        for future in as_completed(futures):
+            future.result()
+
+def _copy_tree_parallel(src, dst, workers=COPY_WORKERS):
+    """
+    并行复制目录树，替代逐个文件顺序复制的 shutil.copytree。
+
+    Windows 下优先调用 robocopy 多线程复制；其他平台先一次性创建所有目标目录，
+    再通过线程池并发提交 _fast_copy 任务，隐藏单个文件的系统调用延迟。
+    """
+    if sys.platform == 'win32':
+        try:
+            result = subprocess.run(
+                ["robocopy", src, dst, "/MT:64", "/E", "/NFL", "/NDL"],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            # robocopy 返回码: 0 = 无需复制, 1 = 复制成功, >1 表示存在差异或错误
+            if result.returncode <= 1:
+                return
+        except OSError:
+            pass  # robocopy 不可用时回退到线程池方案
+
+    copy_jobs = []
+    for root, _dirs, files in os.walk(src):
+        target_root = os.path.join(dst, os.path.relpath(root, src))
+        os.makedirs(target_root, exist_ok=True)
+        for name in files:
+            copy_jobs.append((os.path.join(root, name), os.path.join(target_root, name)))
+
+    _run_copy_jobs(copy_jobs, workers)
+
+def _sync_dir(src, dst, workers=COPY_WORKERS):
+    """
+    增量同步目录 (类似 rsync)：只复制缺失或 (大小, 修改时间) 不一致的文件，
+    并删除目标中多余的条目。未变化的图片不会被重复读写。
+
+    Returns:
+        bool: 目标目录是否发生了变化
+    """
+    os.makedirs(dst, exist_ok=True)
+    src_entries = {e.name: e for e in os.scandir(src)}
+    dst_entries = {e.name: e for e in os.scandir(dst)}
+    changed = False
+
+    copy_jobs = []
+    for name, entry in src_entries.items():
+        src_path = os.path.join(src, name)
+        dst_path = os.path.join(dst, name)
+        dst_entry = dst_entries.get(name)
+        if entry.is_dir():
+            if dst_entry is not None and not dst_entry.is_dir():
+                os.unlink(dst_path)
+            changed = _sync_dir(src_path, dst_path, workers) or changed
+            continue
+
+        if dst_entry is not None and dst_entry.is_file():
+            # 使用 scandir 返回的 DirEntry.stat()，Windows/NFS 上可复用遍历时已获取的信息
+            src_stat = entry.stat(follow_symlinks=False)
+            dst_stat = dst_entry.stat(follow_symlinks=False)
+            if (src_stat.st_size, int(src_stat.st_mtime)) == (dst_stat.st_size, int(dst_stat.st_mtime)):
+                continue
+        elif dst_entry is not None:
+            shutil.rmtree(dst_path)
+        copy_jobs.append((src_path, dst_path))
+
+    # 删除源目录中已不存在的条目
+    for name in dst_entries.keys() - src_entries.keys():
+        dst_path = os.path.join(dst, name)
+        if dst_entries[name].is_dir():
+            shutil.rmtree(dst_path)
+        else:
+            os.unlink(dst_path)
+        changed = True
+
+    _run_copy_jobs(copy_jobs, workers)
+    return changed or bool(copy_jobs)
+
+def _to_final_path(path):
+    """将 data 目录下的路径改写为 data_final 目录下的对应路径"""
+    return _DATA_DIR_RE.sub(r'data_final\1', path, count=1)
+
+def _note_id_from_key(key):
+    """从标注 key (例如 data\\image\\<note_id>\\0.jpg) 中解析出笔记 ID"""
+    parts = key.replace('\\', '/').split('/')
+    try:
+        return parts[parts.index('image') + 1]
+    except (ValueError, IndexError):
+        return None
+
+def _index_annotations(annotations):
+    """一次遍历建立 note_id -> [(key, data), ...] 的倒排索引"""
+    index = defaultdict(list)
+    for key, data in annotations.items():
+        note_id = _note_id_from_key(key)
+        if note_id:
+            index[note_id].append((key, data))
+    return index
+
+def _load_target_annotations(path, target_ids):
+    """
+    加载源标注并按 note_id 建立索引，只保留 target_ids 中的笔记。
+
+    安装了 ijson 时逐条流式解析，不在内存中构建完整的标注字典；
+    否则回退为整体加载后再建立索引。
+    """
+    target_set = set(target_ids)
+    if ijson is None:
+        index = _index_annotations(json_utils.load_json(path))
+        return {note_id: items for note_id, items in index.items() if note_id in target_set}
+
+    index = defaultdict(list)
+    with open(path, 'rb') as f:
+        for key, data in ijson.kvitems(f, '', use_float=True):
+            note_id = _note_id_from_key(key)
+            if note_id in target_set:
+                index[note_id].append((key, data))
+    return index
+
 def add_to_final():
     print("Starting data selection process...")
     
@@ -44,14 +237,12 @@ def add_to_final():
         return
 
     # 2. 确保目标目录存在
-    if not os.path.exists(DST_IMAGE_DIR):
-        os.makedirs(DST_IMAGE_DIR)
-        print(f"Created directory: {DST_IMAGE_DIR}")
+    os.makedirs(DST_IMAGE_DIR, exist_ok=True)
 
     # 3. 加载源标注数据
+    # 按 note_id 建立索引，避免对每个目标 ID 都全量扫描一遍标注
     try:
-        with open(SRC_ANNOTATIONS_FILE, 'r', encoding='utf-8') as f:
-            src_annotations = json.load(f)
+        src_index = _load_target_annotations(SRC_ANNOTATIONS_FILE, TARGET_NOTE_IDS)
     except Exception as e:
         print(f"Error loading source annotations: {e}")
         return
@@ -60,11 +251,14 @@ def add_to_final():
     dst_annotations = {}
     if os.path.exists(DST_ANNOTATIONS_FILE):
         try:
-            with open(DST_ANNOTATIONS_FILE, 'r', encoding='utf-8') as f:
-                dst_annotations = json.load(f)
+            dst_annotations = json_utils.load_json(DST_ANNOTATIONS_FILE)
         except Exception as e:
             print(f"Warning: Could not load existing final annotations, starting fresh. ({e})")
 
+    # 一次性列出源/目标目录下已有的笔记文件夹，后续用集合判断，避免逐个 stat
+    src_ids = {e.name for e in os.scandir(SRC_IMAGE_DIR) if e.is_dir()}
+    dst_ids = {e.name for e in os.scandir(DST_IMAGE_DIR) if e.is_dir()}
+
     # 5. 处理每个目标 ID
     added_count = 0
     updated_count = 0
@@ -76,50 +270,40 @@ def add_to_final():
         src_note_path = os.path.join(SRC_IMAGE_DIR, note_id)
         dst_note_path = os.path.join(DST_IMAGE_DIR, note_id)
         
-        if os.path.exists(src_note_path):
-            # 如果目标已存在，先删除再复制，确保同步最新状态
-            if os.path.exists(dst_note_path):
-                shutil.rmtree(dst_note_path)
-                updated_count += 1
-                print(f"  - Updated image folder: {note_id}")
+        if note_id in src_ids:
+            # 如果目标已存在，只增量同步有变化的文件，确保同步最新状态
+            if note_id in dst_ids:
+                if _sync_dir(src_note_path, dst_note_path):
+                    updated_count += 1
+                    print(f"  - Updated image folder: {note_id}")
+                else:
+                    print(f"  - Image folder unchanged: {note_id}")
             else:
+                _copy_tree_parallel(src_note_path, dst_note_path)
                 added_count += 1
                 print(f"  - Added image folder: {note_id}")
-            
-            shutil.copytree(src_note_path, dst_note_path)
         else:
             print(f"  - Warning: Source image folder not found for {note_id}")
             continue
 
         # --- 处理标注 ---
-        # 查找属于该 note_id 的所有标注条目
-        # 假设路径包含该 ID，例如 data\image\<note_id>\...
-        
-        for key, data in src_annotations.items():
-            # 简单的字符串包含检查，或者根据路径结构解析
-            # 路径分隔符可能是 / 或 \，统一处理
-            normalized_key = key.replace('\\', '/')
-            if f"/{note_id}/" in normalized_key or f"\\{note_id}\\" in key:
-                
-                # 构造新的 key 和 image_path
-                # 将路径中的 data/ 替换为 data_final/
-                # 注意：这里假设原始 key 以 data/ 或 data\ 开头
-                
-                new_key = key.replace('data\\', 'data_final\\').replace('data/', 'data_final/')
-                
-                # 深拷贝数据以免修改源数据
+        # 从索引中直接取出属于该 note_id 的所有标注条目
+        for key, data in src_index.get(note_id, ()):
+            # 将路径中的 data/ 替换为 data_final/
+            new_key = _to_final_path(key)
+
+            # 浅拷贝数据以免修改源数据，同时改写 image_path
+            if 'image_path' in data:
+                new_data = {**data, 'image_path': _to_final_path(data['image_path'])}
+            else:
                 new_data = data.copy()
-                if 'image_path' in new_data:
-                    new_data['image_path'] = new_data['image_path'].replace('data\\', 'data_final\\').replace('data/', 'data_final/')
-                
-                # 添加/更新到目标标注字典
-                dst_annotations[new_key] = new_data
-                # print(f"  - Added annotation: {new_key}")
+
+            # 添加/更新到目标标注字典
+            dst_annotations[new_key] = new_data
 
     # 6. 保存目标标注数据
     try:
-        with open(DST_ANNOTATIONS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(dst_annotations, f, indent=4, ensure_ascii=False)
+        json_utils.dump_json(dst_annotations, DST_ANNOTATIONS_FILE)
         print(f"\nSuccess! Saved annotations to {DST_ANNOTATIONS_FILE}")
         print(f"Total entries in final dataset: {len(dst_annotations)}")
         
@@ -11,12 +11,14 @@ def archive_data():
     # 源文件/文件夹
     image_dir = os.path.join(data_dir, 'image')
     annotations_file = os.path.join(data_dir, 'annotations.json')
+    annotations_jsonl_file = os.path.join(data_dir, 'annotations.jsonl')
     
     # 检查源文件是否存在
     has_image = os.path.exists(image_dir)
     has_annotations = os.path.exists(annotations_file)
+    has_annotations_jsonl = os.path.exists(annotations_jsonl_file)
     
-    if not has_image and not has_annotations:
+    if not has_image and not has_annotations and not has_annotations_jsonl:
         print("No data to archive (image folder and annotations.json not found).")
         return
 
@@ -24,11 +26,30 @@ def archive_data():
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     archive_dir = os.path.join(data_past_dir, timestamp)
     
-    # 创建归档目录
     try:
-        if not os.path.exists(archive_dir):
-            os.makedirs(archive_dir)
-            print(f"Created archive directory: {archive_dir}")
+        # 快速路径：data 目录下只有待归档内容且与 data_past 位于同一设备时，
+        # 直接把整个 data 目录重命名为归档目录，一次系统调用完成，与文件数量无关
+        archive_root = data_past_dir if os.path.exists(data_past_dir) else base_dir
+        only_archivable = set(os.listdir(data_dir)) <= {'image', 'annotations.json', 'annotations.jsonl'}
+        if (only_archivable and not os.path.exists(archive_dir)
+                and os.stat(data_dir).st_dev == os.stat(archive_root).st_dev):
+            os.makedirs(data_past_dir, exist_ok=True)
+            try:
+                os.rename(data_dir, archive_dir)
+            except OSError as e:
+                # 例如 Windows 上 data 目录内有文件被占用时会抛出 PermissionError，
+                # 此时退回到下面逐项移动的方式
+                print(f"Fast archive failed ({e}), falling back to moving entries one by one.")
+            else:
+                print(f"Moved {data_dir} to {archive_dir}")
+                # 重新创建空的 data 目录，供爬虫下次写入
+                os.makedirs(data_dir, exist_ok=True)
+                print("Archive completed successfully.")
+                return
+
+        # 创建归档目录
+        os.makedirs(archive_dir, exist_ok=True)
+        print(f"Archive directory: {archive_dir}")
             
         # 移动 image 文件夹
         if has_image:
@@ -46,6 +67,11 @@ def archive_data():
         else:
             print(f"Annotations file not found: {annotations_file}")
 
+        # 移动爬虫逐条追加的 annotations.jsonl
+        if has_annotations_jsonl:
+            shutil.move(annotations_jsonl_file, archive_dir)
+            print(f"Moved {annotations_jsonl_file} to {archive_dir}")
+
         print("Archive completed successfully.")
         
     except Exception as e:
@@ -0,0 +1,67 @@
+"""
+JSON 编解码工具
+
+爬虫、数据处理与发布脚本共用。优先使用可选依赖 orjson (C/Rust 实现，比标准库快数倍)，
+未安装时回退到标准库 json；两种实现的输出格式一致：UTF-8、中文不转义。
+
+JSON 文件统一通过 dump_json 写出：默认紧凑格式以减小体积，设置环境变量 PRETTY_JSON
+时输出 2 空格缩进的格式。
+"""
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _encoder(pretty: bool = False) -> json.JSONEncoder:
+    """标准库编码器，格式与 orjson 的紧凑 / OPT_INDENT_2 输出保持一致"""
+    if pretty:
+        return json.JSONEncoder(indent=2, ensure_ascii=False)
+    return json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+
+def loads(data):
+    """解析 JSON 字符串或 UTF-8 字节"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj, pretty: bool = False) -> bytes:
+    """
+    序列化为 UTF-8 JSON 字节
+
+    Args:
+        obj: 待序列化的对象
+        pretty: 是否输出 2 空格缩进的格式，默认紧凑格式 (无多余空格)
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+    return _encoder(pretty).encode(obj).encode("utf-8")
+
+
+def load_json(path):
+    """读取 JSON 文件"""
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def dump_json(obj, path):
+    """
+    写入 JSON 文件
+
+    先写入临时文件，再通过 os.replace 一次性替换正式文件，避免写入过程中崩溃导致文件被截断损坏。
+    未安装 orjson 时逐块写出编码结果，不在内存中拼接完整的 JSON 字符串。
+    """
+    pretty = bool(os.environ.get("PRETTY_JSON"))
+    tmp_path = path + ".tmp"
+    if orjson is not None:
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0))
+    else:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(_encoder(pretty).iterencode(obj))
+    os.replace(tmp_path, path)
@@ -1,15 +1,29 @@
 import asyncio
-import json
 import os
 import random
 import re
+import secrets
 from typing import Dict, Optional
 from urllib.parse import quote
 import httpx
 from playwright.async_api import async_playwright
 from loguru import logger
-from xhs_sign_utils import sign_with_playwright
+import json_utils
+from xhs_sign_utils import get_b1_from_localstorage, sign_with_playwright
 
+# 共用 httpx 客户端的默认 User-Agent，API 请求与图片下载都会携带
+_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+
+# 调用小红书 API 时固定不变的请求头，签名与 Cookie 在每次请求时合并进来
+_API_HEADERS = {
+    "Content-Type": "application/json;charset=UTF-8",
+}
+
+# 可重试的 HTTP 状态码：限流与服务端临时错误，其余 4xx 重试也不会成功
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# 中文字符匹配 (预编译，避免每篇笔记都重新查找正则缓存)
+_CJK_RE = re.compile(r'[\u4e00-\u9fa5]')
 
 
 class Visualizer:
@@ -147,7 +161,7 @@ class XhsCrawler:
     - Playwright 用于环境模拟和签名生成（解决 JS 加密难题）。
     - HTTP API (httpx) 用于数据传输（提高爬取速度）。
     """
-    def __init__(self, keywords=None, max_notes_count=10, display_mode=False, display_id=None, enable_filtering=True):
+    def __init__(self, keywords=None, max_notes_count=10, display_mode=False, display_id=None, enable_filtering=True, resume=True):
         """
         初始化爬虫
         
@@ -157,6 +171,7 @@ class XhsCrawler:
             display_mode: 是否开启演示模式（可视化展示）
             display_id: 仅演示特定 ID 的笔记（调试用）
             enable_filtering: 是否开启关键词相关性过滤
+            resume: 是否跳过 data/annotations.jsonl 中已爬取过的笔记（断点续爬）
         """
         self.keywords = keywords if keywords else ["爬虫"]
         self.max_notes_count = max_notes_count
@@ -165,11 +180,31 @@ class XhsCrawler:
         self.context = None
         self.page = None
         self.cookie_dict = {}
+        self._cookie_header = "" # 由 cookie_dict 拼接好的 Cookie 请求头，Cookie 变化时通过 _refresh_cookies 更新
+        self._b1 = "" # 签名所需的 localStorage b1 值，会话内不变，读取一次后缓存
         self._host = "https://edith.xiaohongshu.com" # 小红书 API 域名
         self.display_mode = display_mode
         self.display_id = display_id
         self.enable_filtering = enable_filtering
+        self.resume = resume
         self.visualizer = None
+        self._http = None # 整个爬取过程共用的 httpx 客户端，在 start() 中创建
+        self.image_concurrency = 8 # 图片的最大并发下载数
+        self._image_semaphore = None
+        self.detail_concurrency = 4 # 同一页内笔记详情的最大并发请求数，过高容易触发风控
+        self._detail_semaphore = None
+        self.keyword_concurrency = 3 # 同时搜索的关键词数，每个关键词内部仍按顺序翻页
+        self._sign_lock = None # 所有签名共用同一个浏览器页面，串行调用
+        self.retry_backoff = 1 # 重试退避的基础秒数，第 n 次重试前约等待 retry_backoff * 2^n 秒
+        self.annotations_path = os.path.join("data", "annotations.json")
+        # 爬取过程中每下载一张图片就追加一行标注，崩溃也不会丢失已完成的进度；
+        # 笔记的全部图片都处理完后再追加一行 {"note_done": note_id}，断点续爬只跳过这些笔记
+        self.annotations_jsonl_path = os.path.join("data", "annotations.jsonl")
+        self._annotations_fh = None
+        self._image_root = None
+        self._image_count = 0
+        self._seen_note_ids = set()
+        self._in_flight_note_ids = set() # 正在被某个关键词任务处理的笔记，防止并发关键词重复下载
         
         # 定义高级过滤规则
         # 格式: keyword -> { groups: [[必须包含组1], [必须包含组2]], exclude: [排除词] }
@@ -217,8 +252,7 @@ class XhsCrawler:
             logger.error(f"Cookie 文件不存在: {self.cookie_path}")
             return False
         try:
-            with open(self.cookie_path, 'r') as f:
-                cookies = json.load(f)
+            cookies = json_utils.load_json(self.cookie_path)
             logger.info("成功加载 Cookie 文件。")
             
             # 注入 Cookie
@@ -236,8 +270,7 @@ class XhsCrawler:
             if login_success_element:
                 logger.info("Cookie 登录成功，找到搜索框元素。")
                 # 重新获取最新的 Cookie（可能包含服务端更新的字段）
-                current_cookies = await self.context.cookies()
-                self.cookie_dict = {cookie['name']: cookie['value'] for cookie in current_cookies}
+                await self._refresh_cookies()
                 logger.info("已更新当前会话的 Cookie。")
                 return True
             else:
@@ -247,10 +280,19 @@ class XhsCrawler:
             logger.error(f"使用 Cookie 登录时发生异常: {e}")
             return False
 
+    async def _refresh_cookies(self):
+        """从浏览器上下文读取最新 Cookie，更新 cookie_dict 并重新拼接 Cookie 请求头"""
+        current_cookies = await self.context.cookies()
+        self.cookie_dict = {cookie['name']: cookie['value'] for cookie in current_cookies}
+        self._cookie_header = "; ".join(f"{k}={v}" for k, v in self.cookie_dict.items())
+
     async def _request(self, method, url, retry_count=3, **kwargs):
         """
         封装 HTTP 请求，包含错误处理和重试机制
         
+        网络错误、429/5xx 及 API 返回失败时按指数退避加随机抖动重试；
+        其余 4xx 状态码直接抛出，避免无意义的重复请求加重风控。
+        
         Args:
             method: 请求方法 (GET, POST)
             url: 请求 URL
@@ -265,10 +307,9 @@ class XhsCrawler:
         """
         for i in range(retry_count):
             try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.request(method, url, timeout=60, **kwargs)
+                response = await self._http.request(method, url, **kwargs)
                 response.raise_for_status() # 检查 HTTP 状态码
-                data = response.json()
+                data = json_utils.loads(response.content)
                 
                 # 小红书 API 通常返回 {success: true, data: ...}
                 if data.get("success"):
@@ -277,13 +318,15 @@ class XhsCrawler:
                     raise Exception(f"API 请求失败: {data.get('msg', '未知错误')}")
             except Exception as e:
                 logger.warning(f"请求失败 (尝试 {i+1}/{retry_count}): {e}")
+                if isinstance(e, httpx.HTTPStatusError) and e.response.status_code not in _RETRYABLE_STATUS:
+                    raise
                 if i == retry_count - 1:
                     # 最后一次重试失败，抛出异常
-                    raise e
-                # 随机延迟后重试，避免立即重试再次被拒
-                await asyncio.sleep(random.uniform(1, 3))
+                    raise
+                # 指数退避加随机抖动，避免被限流时集中重试再次被拒
+                await asyncio.sleep(self.retry_backoff * (2 ** i) + random.uniform(0, 1))
 
-    async def _get_signed_headers(self, uri: str, data: Dict) -> Dict:
+    async def _get_signed_headers(self, uri: str, body: bytes) -> Dict:
         """
         生成带有签名的请求头
         
@@ -294,25 +337,155 @@ class XhsCrawler:
         
         Args:
             uri: API 路径 (如 /api/sns/web/v1/search/notes)
-            data: 请求参数字典
+            body: 由 json_utils.dumps 序列化的请求体，签名基于与实际发送完全相同的字节
             
         Returns:
             Dict: 包含完整 Headers 的字典
         """
         a1_value = self.cookie_dict.get("a1", "")
         # 调用签名工具函数，获取 x-s, x-t 等核心参数
-        signs = await sign_with_playwright(self.page, uri, data, a1_value, "POST")
+        async with self._sign_lock:
+            # b1 在页面脚本初始化后才写入 localStorage，读到为止每次重试，之后直接复用
+            if not self._b1:
+                self._b1 = await get_b1_from_localstorage(self.page)
+            signs = await sign_with_playwright(self.page, uri, body, a1_value, "POST", b1=self._b1)
         
         return {
-            "Content-Type": "application/json;charset=UTF-8",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+            **_API_HEADERS,
             "X-S": signs["x-s"],
             "X-T": signs["x-t"],
             "x-S-Common": signs["x-s-common"],
             "X-B3-Traceid": signs["x-b3-traceid"],
-            "Cookie": "; ".join([f"{k}={v}" for k, v in self.cookie_dict.items()]),
+            "Cookie": self._cookie_header,
         }
 
+    def _open_annotations_jsonl(self):
+        """以追加模式打开 annotations.jsonl，返回文件对象"""
+        path = self.annotations_jsonl_path
+        # 上次运行若在写入中途被强制结束，先补齐换行，避免新记录与残缺行拼在同一行
+        needs_newline = False
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+        fh = open(path, "a", encoding="utf-8")
+        if needs_newline:
+            fh.write("\n")
+        return fh
+
+    def _append_annotation(self, record: Dict):
+        """
+        追加一条标注到 annotations.jsonl 并立即刷新到磁盘
+
+        每行一个 JSON 对象，内存占用与已爬取的图片数量无关。
+        """
+        self._annotations_fh.write(json_utils.dumps(record).decode("utf-8") + "\n")
+        self._annotations_fh.flush()
+
+    def _iter_annotation_records(self):
+        """逐行读取 annotations.jsonl，依次产出每条标注记录"""
+        if not os.path.exists(self.annotations_jsonl_path):
+            return
+        with open(self.annotations_jsonl_path, "rb") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json_utils.loads(line)
+                except ValueError:
+                    # 进程被强制结束时最后一行可能只写了一半
+                    logger.warning("annotations.jsonl 中存在无法解析的行，已跳过。")
+
+    def _build_annotations_json(self) -> int:
+        """
+        由 annotations.jsonl 生成下游使用的 annotations.json (以 image_path 为键)
+
+        通过 json_utils.dump_json 原子化写出，输出格式与 add_to_final.py 一致。
+
+        Returns:
+            int: 写入的标注条数
+        """
+        annotations = {}
+        for record in self._iter_annotation_records():
+            if "image_path" not in record:
+                continue # 笔记完成标记，不是图片标注
+            # 同一图片重复下载时以最新的记录为准
+            annotations[record["image_path"]] = record
+        if not annotations:
+            return 0
+
+        json_utils.dump_json(annotations, self.annotations_path)
+        return len(annotations)
+
+    async def _fetch_note_detail(self, note_id: str, xsec_token: str) -> Optional[Dict]:
+        """在 self._detail_semaphore 限制下获取笔记详情，每次请求前保留随机延迟"""
+        async with self._detail_semaphore:
+            # --- 反爬虫策略：随机延迟 ---
+            # 详情页访问间隔
+            await asyncio.sleep(random.uniform(1, 3))
+            return await self.get_note_detail(note_id, xsec_token)
+
+    @staticmethod
+    def _write_file(path: str, content: bytes):
+        """
+        写入二进制文件 (在线程池中执行，不阻塞事件循环)
+
+        先写入 .part 临时文件再 os.replace 到正式文件名，中途被结束时只会留下 .part，
+        断点续爬不会把截断的图片当作已下载。
+        """
+        part_path = path + ".part"
+        with open(part_path, "wb") as f:
+            f.write(content)
+        os.replace(part_path, path)
+
+    async def _fetch_image(self, idx: int, img_info: Dict, note_dir: str, seen_urls: set) -> Optional[str]:
+        """
+        下载并保存单张图片（并发安全，受 self._image_semaphore 限制）
+        
+        Args:
+            idx: 图片在笔记中的序号，用作文件名
+            img_info: 详情 API 返回的图片信息
+            note_dir: 笔记图片保存目录
+            seen_urls: 该笔记已处理过的图片 URL，用于跳过重复图片
+            
+        Returns:
+            图片保存路径；图片不符合要求时返回 None
+        """
+        # --- 数据过滤：图像分辨率不低于500p ---
+        width = img_info.get("width", 0)
+        height = img_info.get("height", 0)
+        if width < 500 or height < 500:
+            logger.warning(f"图片分辨率过低 ({width}x{height})，跳过: {img_info.get('url', '')[:30]}...")
+            return None
+        # ------------------------------------
+
+        # 优先获取 url，如果没有则尝试 url_default (通常是高质量图)，最后尝试 url_pre
+        img_url = img_info.get("url") or img_info.get("url_default") or img_info.get("url_pre")
+        if not img_url:
+            logger.warning(f"图片信息中未找到有效URL: {img_info}")
+            return None
+        # 在第一个 await 之前完成检查与登记，并发任务之间不会出现竞争
+        if img_url in seen_urls:
+            logger.info(f"笔记中存在重复图片，跳过: {img_url[:30]}...")
+            return None
+        seen_urls.add(img_url)
+
+        img_path = os.path.join(note_dir, f"{idx}.jpg")
+        # 断点续爬：上次已完整下载的图片直接复用 (过小的文件视为下载不完整)
+        if os.path.exists(img_path) and os.path.getsize(img_path) > 1024:
+            logger.info(f"图片已存在，跳过下载: {img_path}")
+            return img_path
+
+        async with self._image_semaphore:
+            img_response = await self._http.get(img_url)
+        img_response.raise_for_status()
+        # 磁盘写入放到默认线程池执行，期间事件循环可继续处理其他下载与签名
+        # (使用 run_in_executor 而非 asyncio.to_thread，以兼容 Python 3.8)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._write_file, img_path, img_response.content)
+        return img_path
+
     async def get_note_detail(self, note_id: str, xsec_token: str) -> Optional[Dict]:
         """
         获取笔记详情数据
@@ -336,14 +509,14 @@ class XhsCrawler:
         }
         try:
             # 1. 生成签名头
-            headers = await self._get_signed_headers(uri, data)
-            json_str = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+            body = json_utils.dumps(data)
+            headers = await self._get_signed_headers(uri, body)
             
             # 2. 发送请求
             response_data = await self._request(
                 method="POST",
                 url=f"{self._host}{uri}",
-                content=json_str,
+                content=body,
                 headers=headers,
             )
             
@@ -362,112 +535,175 @@ class XhsCrawler:
         执行搜索主逻辑
         
         流程:
-        1. 遍历关键词列表。
+        1. 并发遍历关键词列表 (受 keyword_concurrency 限制)。
         2. 分页调用搜索 API (/api/sns/web/v1/search/notes)。
         3. 遍历搜索结果，提取 note_id 和 xsec_token。
         4. 调用详情 API 获取完整内容。
-        5. 下载图片并保存标注数据。
+        5. 下载图片并逐条追加标注数据。
+        6. 由 annotations.jsonl 生成汇总的 annotations.json。
         """
         logger.info(f"开始搜索关键词: {self.keywords}")
         
-        annotations = {}
-        image_count = 0
+        self._image_count = 0
+        # 信号量需在事件循环内创建
+        self._image_semaphore = asyncio.Semaphore(self.image_concurrency)
+        self._detail_semaphore = asyncio.Semaphore(self.detail_concurrency)
+        self._sign_lock = asyncio.Lock()
+        # 已成功处理的笔记 ID，不同关键词可能搜到同一篇笔记，避免重复下载
+        self._seen_note_ids = set()
+        self._in_flight_note_ids = set()
+        if self.resume and not self.display_mode:
+            # 断点续爬：只有写入了完成标记的笔记才视为已完成，部分图片失败或
+            # 中途被结束的笔记会重新处理 (已完整写入磁盘的图片不会重复下载)
+            self._seen_note_ids = {
+                record["note_done"] for record in self._iter_annotation_records() if "note_done" in record
+            }
+            if self._seen_note_ids:
+                logger.info(f"断点续爬：跳过 {len(self._seen_note_ids)} 篇已爬取的笔记。")
         data_dir = "data"
-        os.makedirs(data_dir, exist_ok=True)
+        # 图片根目录只计算并创建一次，每篇笔记只需在其下创建自己的子目录
+        self._image_root = os.path.join(data_dir, "image")
+        os.makedirs(self._image_root, exist_ok=True)
+
+        with self._open_annotations_jsonl() as self._annotations_fh:
+            # 多个关键词并发搜索；演示模式下页面跳转需按顺序展示，仍逐个处理
+            keyword_semaphore = asyncio.Semaphore(1 if self.display_mode else self.keyword_concurrency)
+
+            async def run_keyword(keyword):
+                async with keyword_semaphore:
+                    await self._search_keyword(keyword)
+
+            results = await asyncio.gather(*[run_keyword(kw) for kw in self.keywords], return_exceptions=True)
+            for keyword, result in zip(self.keywords, results):
+                if isinstance(result, Exception):
+                    logger.error(f"关键词 '{keyword}' 搜索时发生错误: {result}")
+        self._annotations_fh = None
+
+        # 7. 由 annotations.jsonl 生成汇总的标注文件
+        count = self._build_annotations_json()
+        if count:
+            logger.info(f"标注文件 annotations.json 已保存，共包含 {count} 条记录。")
+        else:
+            logger.warning("没有生成任何标注数据。")
 
-        for keyword in self.keywords:
-            processed_notes_count = 0
+    async def _search_keyword(self, keyword: str):
+        """
+        分页搜索单个关键词，并处理搜索结果中的笔记
 
-            # --- 演示用：跳转到搜索页面 ---
-            try:
-                if self.display_mode and self.visualizer:
-                    self.visualizer.show_search_page(keyword)
-            except Exception as e:
-                logger.warning(f"跳转搜索页面失败: {e}")
-            # ---------------------------
+        Args:
+            keyword: 搜索关键词
+        """
+        processed_notes_count = 0
 
-            page_num = 1
-            search_id = "".join(random.choice("0123456789abcdef") for _ in range(32))
+        # --- 演示用：跳转到搜索页面 ---
+        try:
+            if self.display_mode and self.visualizer:
+                self.visualizer.show_search_page(keyword)
+        except Exception as e:
+            logger.warning(f"跳转搜索页面失败: {e}")
+        # ---------------------------
+
+        page_num = 1
+        search_id = secrets.token_hex(16)
             
-            while True:
-                # 检查是否达到最大爬取数量
-                if processed_notes_count >= self.max_notes_count:
-                    break
-                logger.info(f"正在 API 搜索 '{keyword}' 的第 {page_num} 页...")
+        while True:
+            # 检查是否达到最大爬取数量
+            if processed_notes_count >= self.max_notes_count:
+                break
+            logger.info(f"正在 API 搜索 '{keyword}' 的第 {page_num} 页...")
                 
-                # --- 反爬虫策略：随机延迟 ---
-                # 模拟人类翻页的时间间隔，避免高频请求
-                await asyncio.sleep(random.uniform(2, 5))
-
-
-                # 1. 构造搜索 API 请求参数
-                uri = "/api/sns/web/v1/search/notes"
-                data = {
-                    "keyword": keyword,
-                    "page": page_num,
-                    "page_size": 20,
-                    "search_id": search_id,
-                    "sort": "general",
-                    "note_type": 0,
-                }
+            # --- 反爬虫策略：随机延迟 ---
+            # 模拟人类翻页的时间间隔，避免高频请求
+            await asyncio.sleep(random.uniform(2, 5))
+
+
+            # 1. 构造搜索 API 请求参数
+            uri = "/api/sns/web/v1/search/notes"
+            data = {
+                "keyword": keyword,
+                "page": page_num,
+                "page_size": 20,
+                "search_id": search_id,
+                "sort": "general",
+                "note_type": 0,
+            }
                 
-                try:
-                    # 生成签名并请求
-                    headers = await self._get_signed_headers(uri, data)
-                    json_str = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
-                    response_data = await self._request(
-                        method="POST",
-                        url=f"{self._host}{uri}",
-                        content=json_str,
-                        headers=headers,
-                    )
-                except Exception as e:
-                    logger.error(f"API 搜索失败: {e}")
-                    break # API搜索失败，终止当前关键词的搜索
-
-                # 检查是否还有更多内容
-                if not response_data or not response_data.get("items"):
-                    logger.info(f"关键词 '{keyword}' 第 {page_num} 页没有更多内容了。")
-                    break
-
-                # 2. 遍历搜索结果列表
-                for item in response_data.get("items", []):
-                    # 过滤非笔记类型的内容
-                    if item.get("model_type") != "note":
-                        continue
-                    if processed_notes_count >= self.max_notes_count:
-                        break
+            try:
+                # 生成签名并请求
+                body = json_utils.dumps(data)
+                headers = await self._get_signed_headers(uri, body)
+                response_data = await self._request(
+                    method="POST",
+                    url=f"{self._host}{uri}",
+                    content=body,
+                    headers=headers,
+                )
+            except Exception as e:
+                logger.error(f"API 搜索失败: {e}")
+                break # API搜索失败，终止当前关键词的搜索
+
+            # 检查是否还有更多内容
+            if not response_data or not response_data.get("items"):
+                logger.info(f"关键词 '{keyword}' 第 {page_num} 页没有更多内容了。")
+                break
+
+            # 2. 筛选出本页需要处理的笔记 (note_id, xsec_token)
+            pairs = []
+            for item in response_data.get("items", []):
+                # 过滤非笔记类型的内容
+                if item.get("model_type") != "note":
+                    continue
                     
-                    note_id = item.get("id")
+                note_id = item.get("id")
                     
-                    # 演示模式下，如果指定了 display_id，则只处理该 ID
-                    if self.display_mode and note_id != self.display_id:
-                        continue
+                # 演示模式下，如果指定了 display_id，则只处理该 ID
+                if self.display_mode and note_id != self.display_id:
+                    continue
                         
-                    # 处理 ID 中可能包含的额外参数
-                    if '#' in note_id:
-                        note_id = note_id.split('#')[0]
-                    # 提取 xsec_token    
-                    xsec_token = item.get("xsec_token")
-
-                    if not note_id or not xsec_token:
+                # 处理 ID 中可能包含的额外参数
+                if '#' in note_id:
+                    note_id = note_id.split('#')[0]
+                # 提取 xsec_token    
+                xsec_token = item.get("xsec_token")
+
+                if not note_id or not xsec_token:
+                    continue
+
+                if note_id in self._seen_note_ids or note_id in self._in_flight_note_ids:
+                    logger.info(f"笔记 {note_id} 已爬取过或正在处理，跳过。")
+                    continue
+                pairs.append((note_id, xsec_token))
+
+            # 3. 分批并发获取笔记详情：每批只取仍需的笔记数，避免多余的详情请求；
+            #    详情到齐后再按顺序解析、下载图片
+            while pairs and processed_notes_count < self.max_notes_count:
+                batch_size = 1 if self.display_mode else self.max_notes_count - processed_notes_count
+                batch, pairs = pairs[:batch_size], pairs[batch_size:]
+
+                # --- 演示用：跳转到详情页 ---
+                if self.display_mode and self.visualizer:
+                    for note_id, xsec_token in batch:
+                        try:
+                            self.visualizer.show_note_detail(note_id, xsec_token)
+                        except Exception as e:
+                            logger.warning(f"跳转详情页失败: {e}")
+                # ----------------------------------
+
+                for note_id, _ in batch:
+                    logger.info(f"准备获取笔记 {note_id} 的详情...")
+                details = await asyncio.gather(
+                    *[self._fetch_note_detail(note_id, xsec_token) for note_id, xsec_token in batch]
+                )
+
+                display_done = False
+                for (note_id, xsec_token), detail_data in zip(batch, details):
+                    # 其他关键词的并发任务可能在详情请求期间已处理或正在处理同一篇笔记。
+                    # 检查与占用之间没有 await，占用后其他任务会直接跳过该笔记
+                    if note_id in self._seen_note_ids or note_id in self._in_flight_note_ids:
+                        logger.info(f"笔记 {note_id} 已爬取过或正在处理，跳过。")
                         continue
-                    
+                    self._in_flight_note_ids.add(note_id)
                     try:
-                        # --- 演示用：跳转到详情页 ---
-                        if self.display_mode and self.visualizer:   
-                            self.visualizer.show_note_detail(note_id, xsec_token)
-                        # ----------------------------------
-
-                        logger.info(f"准备获取笔记 {note_id} 的详情...")
-                        
-                        # --- 反爬虫策略：随机延迟 ---
-                        # 详情页访问间隔
-                        await asyncio.sleep(random.uniform(1, 3))
-
-
-                        # 3. 获取笔记详细内容
-                        detail_data = await self.get_note_detail(note_id, xsec_token)
                         if not detail_data:
                             logger.warning(f"笔记 {note_id} 详情获取失败或为空")
                             continue
@@ -482,7 +718,7 @@ class XhsCrawler:
 
                         # --- 数据过滤：文本标注不少于10个中文字符 ---
                         # 保证爬取的数据质量
-                        chinese_char_count = len(re.findall(r'[\u4e00-\u9fa5]', text_content))
+                        chinese_char_count = len(_CJK_RE.findall(text_content))
                         if chinese_char_count < 10:
                             logger.warning(f"笔记 {note_id} 中文字符数不足 ({chinese_char_count} < 10)，跳过。")
                             continue
@@ -584,7 +820,7 @@ class XhsCrawler:
                         
                         # 准备图片下载目录：data/image/note_id
                         folder_name = note_id
-                        current_note_dir = os.path.join(data_dir, "image", folder_name)
+                        current_note_dir = os.path.join(self._image_root, folder_name)
                         os.makedirs(current_note_dir, exist_ok=True)
                         
                         logger.info(f"笔记 {note_id} 解析: image_list长度={len(image_list)}, text_content长度={len(text_content)}")
@@ -593,35 +829,27 @@ class XhsCrawler:
                             logger.warning(f"笔记 {note_id} 缺少文本或图片，跳过。")
                             continue
                         
+                        # 5. 并发下载该笔记的所有图片 (受信号量限制并发数)
+                        seen_urls = set()
+                        tasks = [
+                            self._fetch_image(idx, img_info, current_note_dir, seen_urls)
+                            for idx, img_info in enumerate(image_list)
+                        ]
+                        results = await asyncio.gather(*tasks, return_exceptions=True)
+
                         note_success = False
-                        for img_info in image_list:
-                            # --- 数据过滤：图像分辨率不低于500p ---
-                            width = img_info.get("width", 0)
-                            height = img_info.get("height", 0)
-                            if width < 500 or height < 500:
-                                logger.warning(f"图片分辨率过低 ({width}x{height})，跳过: {img_info.get('url', '')[:30]}...")
+                        note_complete = True
+                        for result in results:
+                            if isinstance(result, Exception):
+                                logger.error(f"笔记 {note_id} 的图片下载失败: {result}")
+                                note_complete = False
                                 continue
-                            # ------------------------------------
-
-                            # 优先获取 url，如果没有则尝试 url_default (通常是高质量图)，最后尝试 url_pre
-                            img_url = img_info.get("url") or img_info.get("url_default") or img_info.get("url_pre")
-                            if not img_url:
-                                logger.warning(f"图片信息中未找到有效URL: {img_info}")
+                            if result is None:
                                 continue
+                            relative_path = result
                             
-                            # 4. 下载图片
-                            async with httpx.AsyncClient() as client:
-                                img_response = await client.get(img_url, timeout=60)
-                            img_response.raise_for_status()
-                            
-                            file_name = f"{image_list.index(img_info)}.jpg"
-                            relative_path = os.path.join(current_note_dir, file_name)
-                            
-                            with open(relative_path, "wb") as f:
-                                f.write(img_response.content)
-                            
-                            # 5. 记录标注数据
-                            annotations[relative_path] = {
+                            # 6. 记录标注数据
+                            self._append_annotation({
                                 "image_path": relative_path,
                                 "content": {
                                     "title": title,
@@ -638,13 +866,19 @@ class XhsCrawler:
                                     "ip_location": ip_location,
                                     "url": f"https://www.xiaohongshu.com/explore/{note_id}"
                                 }
-                            }
-                            image_count += 1
-                            logger.info(f"成功下载图片 {relative_path}，当前图文对: {image_count}")
+                            })
+                            self._image_count += 1
+                            logger.info(f"成功下载图片 {relative_path}，当前图文对: {self._image_count}")
                             note_success = True
                         
+                        if note_success:
+                            self._seen_note_ids.add(note_id)
+                            if note_complete:
+                                # 被过滤的低分辨率图与重复图不影响完成状态，只有下载失败才需下次重试
+                                self._append_annotation({"note_done": note_id})
                         if self.display_mode and note_success:
                             logger.info(f"关键词 '{keyword}' 已处理1条笔记: {note_id}")
+                            display_done = True
                             break
                         if note_success:
                             processed_notes_count += 1
@@ -655,54 +889,55 @@ class XhsCrawler:
                     except Exception as e:
                         logger.error(f"处理笔记 {note_id} 时发生错误: {e}")
                         continue
-                if self.display_mode:
-                    logger.info(f"演示笔记已爬取完毕")
-                    break
-                if not response_data.get("has_more"):
-                    logger.info(f"关键词 '{keyword}' 已搜索完毕。")
+                    finally:
+                        # 成功时已加入 _seen_note_ids；失败则释放占用，允许其他关键词重试该笔记
+                        self._in_flight_note_ids.discard(note_id)
+                if display_done:
                     break
+            if self.display_mode:
+                logger.info(f"演示笔记已爬取完毕")
+                break
+            if not response_data.get("has_more"):
+                logger.info(f"关键词 '{keyword}' 已搜索完毕。")
+                break
                 
-                page_num += 1
-
-        
-        # 6. 保存汇总的标注文件
-        if annotations:
-            with open(os.path.join("data", "annotations.json"), "w", encoding="utf-8") as f:
-                json.dump(annotations, f, ensure_ascii=False, indent=4)
-            logger.info(f"标注文件 annotations.json 已保存，共包含 {len(annotations)} 条记录。")
-        else:
-            logger.warning("没有生成任何标注数据。")
+            page_num += 1
 
     async def start(self):
         """
         启动爬虫主流程
         
-        1. 启动 Playwright 浏览器。
-        2. 如果开启演示模式，启动 Visualizer。
-        3. 登录并执行搜索。
+        1. 创建共用的 httpx 客户端（复用连接池与 TLS 会话，支持 HTTP/2）。
+        2. 启动 Playwright 浏览器。
+        3. 如果开启演示模式，启动 Visualizer。
+        4. 登录并执行搜索。
         """
         logger.info("开始启动小红书爬虫...准备登录中")
-        async with async_playwright() as p:
+        http_limits = httpx.Limits(max_connections=32, max_keepalive_connections=16)
+        async with httpx.AsyncClient(http2=True, timeout=60, limits=http_limits,
+                                     headers={"User-Agent": _USER_AGENT}) as self._http, \
+                async_playwright() as p:
             self.browser = await p.chromium.launch(headless=False)
-            self.context = await self.browser.new_context()
-            
-            # 初始化演示器
-            if self.display_mode:
-                self.visualizer = Visualizer(self.context)
-                await self.visualizer.start()
+            try:
+                self.context = await self.browser.new_context()
+                
+                # 初始化演示器
+                if self.display_mode:
+                    self.visualizer = Visualizer(self.context)
+                    await self.visualizer.start()
 
-            # 执行登录和搜索
-            if await self._login_with_cookies():
-                await self.search()
-            else:
-                logger.error("因登录失败，程序即将退出。")
-            
-            # 停止演示器（如有）
-            if self.visualizer:
-                await self.visualizer.stop()
+                # 执行登录和搜索
+                if await self._login_with_cookies():
+                    await self.search()
+                else:
+                    logger.error("因登录失败，程序即将退出。")
+            finally:
+                # 无论正常结束还是中途出错，都停止演示器（如有）并关闭浏览器
+                if self.visualizer:
+                    await self.visualizer.stop()
 
-            await self.browser.close()
-            logger.info("浏览器已关闭。")
+                await self.browser.close()
+                logger.info("浏览器已关闭。")
 
 if __name__ == '__main__':
     # --- 配置区域 ---
@@ -710,6 +945,7 @@ if __name__ == '__main__':
     TEST_SEARCH_KEYWORDS = ["网购题材手绘漫画"]  # 演示用搜索关键词列表
     MAX_NOTES_COUNT = 15       # 想要爬取的帖子总数量
     ENABLE_FILTERING = False    # 是否开启关键词相关性过滤（True=开启，False=关闭）
+    RESUME = True               # 是否跳过 data/ 中已爬取过的笔记（断点续爬）
     # ----------------
 
     try:
@@ -717,7 +953,8 @@ if __name__ == '__main__':
                             keywords=SEARCH_KEYWORDS, 
                             max_notes_count=MAX_NOTES_COUNT, 
                             display_mode=False,
-                            enable_filtering=ENABLE_FILTERING)
+                            enable_filtering=ENABLE_FILTERING,
+                            resume=RESUME)
         asyncio.run(crawler.start())
         logger.info("脚本执行完毕。")
     except KeyboardInterrupt:
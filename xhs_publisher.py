@@ -7,6 +7,17 @@ import httpx
 from typing import List, Dict
 from playwright.async_api import async_playwright, Page, BrowserContext, expect
 from loguru import logger
+import json_utils
+
+# 原帖中的话题标签 (井号包裹的内容)，例如 "#插画[话题]#"
+_TOPIC_TAG_RE = re.compile(r"#[^#]+#")
+
+# 追加在正文末尾的版权声明，只需填入原作者与原帖链接
+_DISCLAIMER_TEMPLATE = (
+    "\n\n--------------------\n原作者：{nickname}\n原帖链接：{url}\n\n"
+    "⚠️ 声明：本内容仅作为 Python 爬虫与 AI 自动化技术的学习演示。"
+    "文案由 AI 基于原帖内容重写，仅供参考。引用内容版权归原作者所有，如有侵权请联系删除。"
+)
 
 def load_env(env_path=".env"):
     """
@@ -203,10 +214,9 @@ class XhsPublisher:
         # 加载 Cookies
         if os.path.exists(self.cookie_file):
             try:
-                with open(self.cookie_file, "r", encoding="utf-8") as f:
-                    cookies = json.load(f)
-                    await self.browser_context.add_cookies(cookies)
-                    logger.info(f"成功加载 {len(cookies)} 个 Cookies。")
+                cookies = json_utils.load_json(self.cookie_file)
+                await self.browser_context.add_cookies(cookies)
+                logger.info(f"成功加载 {len(cookies)} 个 Cookies。")
             except Exception as e:
                 logger.error(f"加载 Cookies 失败: {e}")
         else:
@@ -292,15 +302,15 @@ class XhsPublisher:
                 
                 # 鼠标悬停
                 await publish_btn_trigger.hover()
-                await self.page.wait_for_timeout(1000) # 等待菜单浮现
+                
+                # 等待菜单中的“上传图文”出现，而不是固定等待
+                upload_img_btn = self.page.get_by_text("上传图文").first
+                await upload_img_btn.wait_for(state="attached", timeout=5000)
                 
                 logger.info("菜单已展开，点击‘上传图文’...")
                 # 点击出现的“上传图文”链接/按钮
-                upload_img_btn = self.page.get_by_text("上传图文").first
                 await upload_img_btn.dispatch_event("click")
-                
-                # 等待切换/导航完成
-                await self.page.wait_for_timeout(2000)
+                # 切换完成的标志是下方图片上传控件出现，由后续 wait_for 等待
                 
             except Exception as e:
                 logger.error(f"切换图文模式过程出错: {e}")
@@ -335,12 +345,12 @@ class XhsPublisher:
                 logger.success("检测到图片预览元素，确认上传成功。")
             except Exception as e:
                 logger.warning(f"等待图片预览超时 (可能是选择器不匹配或上传慢)，尝试继续填充标题和内容... Error: {e}")
-            
-            await asyncio.sleep(2) # 缓冲
 
             # 3. 输入标题
             logger.info(f"正在输入标题: {title}")
             title_input = self.page.locator(".title-container input")
+            # 等待标题输入框可见 (上传后编辑区域才会渲染)
+            await title_input.wait_for(state="visible", timeout=10000)
             await title_input.fill(title)
             
             # 4. 输入正文
@@ -349,8 +359,6 @@ class XhsPublisher:
             editor = self.page.locator(".tiptap.ProseMirror")
             await editor.click() # 聚焦
             await editor.fill(content) # Playwright 的 fill 对 contenteditable 通常有效
-   
-            await asyncio.sleep(2)# 缓冲
 
             # 5. 设置内容声明
             try:
@@ -364,12 +372,11 @@ class XhsPublisher:
                 declaration_trigger = self.page.get_by_text("添加内容类型声明")
                 if await declaration_trigger.count() > 0:
                     await declaration_trigger.first.click()
-                    await asyncio.sleep(0.5)
                     
                     # 悬停到弹出的菜单栏中的“内容来源声明”
+                    # (Playwright 的 hover/click 会自动等待元素可见且稳定，无需固定等待)
                     source_declaration_menu = self.page.get_by_text("内容来源声明")
                     await source_declaration_menu.first.hover()
-                    await asyncio.sleep(0.5)
                     
                     # 在右侧的选项栏中找到“已在正文中自主标注”并点击
                     custom_annotation_option = self.page.get_by_text("已在正文中自主标注")
@@ -380,8 +387,6 @@ class XhsPublisher:
             except Exception as e:
                 logger.warning(f"设置内容声明时出错: {e}")
 
-            await asyncio.sleep(2)# 缓冲
-
             # 6. 发布
             if dry_run:
                 logger.info("演示模式：跳过点击发布按钮。")
@@ -458,8 +463,7 @@ async def main():
     annotations_path = os.path.join(base_dir, "data_final", "annotations.json")
     if os.path.exists(annotations_path):
         try:
-            with open(annotations_path, "r", encoding="utf-8") as f:
-                annotations = json.load(f)
+            annotations = json_utils.load_json(annotations_path)
             
             # 遍历 annotations 寻找匹配 note_id 的条目
             found_note = False
@@ -472,7 +476,7 @@ async def main():
                     
                     # 移除原话题标签 (井号包裹的内容)
                     # 避免旧的标签干扰 AI 的理解，和直接复用旧标签
-                    content = re.sub(r"#[^#]+#", "", content)
+                    content = _TOPIC_TAG_RE.sub("", content)
                     content = content.strip()
                     
                     # 获取原作者和链接，用于生成版权声明
@@ -488,8 +492,7 @@ async def main():
                             logger.info(f"-------- AI 生成的新文案 --------\n标题: {title}\n内容: {content}\n--------------------------------")
 
                     # 添加声明信息 
-                    disclaimer = f"\n\n--------------------\n原作者：{nickname}\n原帖链接：{url}\n\n⚠️ 声明：本内容仅作为 Python 爬虫与 AI 自动化技术的学习演示。文案由 AI 基于原帖内容重写，仅供参考。引用内容版权归原作者所有，如有侵权请联系删除。"
-                    content += disclaimer
+                    content += _DISCLAIMER_TEMPLATE.format(nickname=nickname, url=url)
                     
                     found_note = True
                     logger.info(f"最终待发布的笔记信息:\n标题: {title}\n内容摘要: {content[:20]}...")
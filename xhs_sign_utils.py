@@ -1,139 +1,76 @@
 
-import ctypes
-import random
 import hashlib
 import json
+import secrets
+import sys
 import time
+import zlib
 from typing import Any, Dict, Optional, Union
 from urllib.parse import quote
 from playwright.async_api import Page
 
+try:
+    from pybase64 import b64encode as _b64encode  # 可选依赖：SIMD 加速的 Base64 编码
+except ImportError:
+    from base64 import b64encode as _b64encode
+
 # --- 签名算法相关常量 ---
 # 这些常量用于模拟小红书的签名算法，源自对 xhs_sign.py 的逆向分析
-BASE64_CHARS = list("ZmserbBoHQtNP+wOcza/LpngG8yJq42KWYj0DSfdikx3VT16IlUAFM97hECvuRX5")
-CRC32_TABLE = [
-    0, 1996959894, 3993919788, 2567524794, 124634137, 1886057615, 3915621685,
-    2657392035, 249268274, 2044508324, 3772115230, 2547177864, 162941995,
-    2125561021, 3887607047, 2428444049, 498536548, 1789927666, 4089016648,
-    2227061214, 450548861, 1843258603, 4107580753, 2211677639, 325883990,
-    1684777152, 4251122042, 2321926636, 335633487, 1661365465, 4195302755,
-    2366115317, 997073096, 1281953886, 3579855332, 2724688242, 1006888145,
-    1258607687, 3524101629, 2768942443, 901097722, 1119000684, 3686517206,
-    2898065728, 853044451, 1172266101, 3705015759, 2882616665, 651767980,
-    1373503546, 3369554304, 3218104598, 565507253, 1454621731, 3485111705,
-    3099436303, 671266974, 1594198024, 3322730930, 2970347812, 795835527,
-    1483230225, 3244367275, 3060149565, 1994146192, 31158534, 2563907772,
-    4023717930, 1907459465, 112637215, 2680153253, 3904427059, 2013776290,
-    251722036, 2517215374, 3775830040, 2137656763, 141376813, 2439277719,
-    3865271297, 1802195444, 476864866, 2238001368, 4066508878, 1812370925,
-    453092731, 2181625025, 4111451223, 1706088902, 314042704, 2344532202,
-    4240017532, 1658658271, 366619977, 2362670323, 4224994405, 1303535960,
-    984961486, 2747007092, 3569037538, 1256170817, 1037604311, 2765210733,
-    3554079995, 1131014506, 879679996, 2909243462, 3663771856, 1141124467,
-    855842277, 2852801631, 3708648649, 1342533948, 654459306, 3188396048,
-    3373015174, 1466479909, 544179635, 3110523913, 3462522015, 1591671054,
-    702138776, 2966460450, 3352799412, 1504918807, 783551873, 3082640443,
-    3233442989, 3988292384, 2596254646, 62317068, 1957810842, 3939845945,
-    2647816111, 81470997, 1943803523, 3814918930, 2489596804, 225274430,
-    2053790376, 3826175755, 2466906013, 167816743, 2097651377, 4027552580,
-    2265490386, 503444072, 1762050814, 4150417245, 2154129355, 426522225,
-    1852507879, 4275313526, 2312317920, 282753626, 1742555852, 4189708143,
-    2394877945, 397917763, 1622183637, 3604390888, 2714866558, 953729732,
-    1340076626, 3518719985, 2797360999, 1068828381, 1219638859, 3624741850,
-    2936675148, 906185462, 1090812512, 3747672003, 2825379669, 829329135,
-    1181335161, 3412177804, 3160834842, 628085408, 1382605366, 3423369109,
-    3138078467, 570562233, 1426400815, 3317316542, 2998733608, 733239954,
-    1555261956, 3268935591, 3050360625, 752459403, 1541320221, 2607071920,
-    3965973030, 1969922972, 40735498, 2617837225, 3943577151, 1913087877,
-    83908371, 2512341634, 3803740692, 2075208622, 213261112, 2463272603,
-    3855990285, 2094854071, 198958881, 2262029012, 4057260610, 1759359992,
-    534414190, 2176718541, 4139329115, 1873836001, 414664567, 2282248934,
-    4279200368, 1711684554, 285281116, 2405801727, 4167216745, 1634467795,
-    376229701, 2685067896, 3608007406, 1308918612, 956543938, 2808555105,
-    3495958263, 1231636301, 1047427035, 2932959818, 3654703836, 1088359270,
-    936918000, 2847714899, 3736837829, 1202900863, 817233897, 3183342108,
-    3401237130, 1404277552, 615818150, 3134207493, 3453421203, 1423857449,
-    601450431, 3009837614, 3294710456, 1567103746, 711928724, 3020668471,
-    3272380065, 1510334235, 755167117,
-]
+BASE64_CHARS = b"ZmserbBoHQtNP+wOcza/LpngG8yJq42KWYj0DSfdikx3VT16IlUAFM97hECvuRX5"
+# 标准 Base64 字母表到 BASE64_CHARS 的逐字节映射表，填充符 "=" 保持不变
+_XHS_B64_TABLE = bytes.maketrans(
+    b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/",
+    BASE64_CHARS,
+)
 
 # --- 辅助函数：签名算法实现 ---
 
-def _right_shift_unsigned(num: int, bit: int = 0) -> int:
-    """无符号右移"""
-    val = ctypes.c_uint32(num).value >> bit
-    MAX32INT = 4294967295
-    return (val + (MAX32INT + 1)) % (2 * (MAX32INT + 1)) - MAX32INT - 1
-
 def mrc(e: str) -> int:
-    """CRC32 变种计算"""
-    o = -1
-    for n in range(min(57, len(e))):
-        o = CRC32_TABLE[(o & 255) ^ ord(e[n])] ^ _right_shift_unsigned(o, 8)
-    return o ^ -1 ^ 3988292384
-
-def _triplet_to_base64(e: int) -> str:
-    """将3字节整数转换为Base64字符"""
-    return (
-        BASE64_CHARS[(e >> 18) & 63]
-        + BASE64_CHARS[(e >> 12) & 63]
-        + BASE64_CHARS[(e >> 6) & 63]
-        + BASE64_CHARS[e & 63]
-    )
-
-def _encode_chunk(data: list, start: int, end: int) -> str:
-    """编码数据块"""
-    result = []
-    for i in range(start, end, 3):
-        c = ((data[i] << 16) & 0xFF0000) + ((data[i + 1] << 8) & 0xFF00) + (data[i + 2] & 0xFF)
-        result.append(_triplet_to_base64(c))
-    return "".join(result)
-
-def encode_utf8(s: str) -> list:
-    """将字符串编码为UTF-8字节列表"""
-    encoded = quote(s, safe="~()*!.'")
-    result = []
-    i = 0
-    while i < len(encoded):
-        if encoded[i] == "%":
-            result.append(int(encoded[i + 1: i + 3], 16))
-            i += 3
-        else:
-            result.append(ord(encoded[i]))
-            i += 1
-    return result
-
-def b64_encode(data: list) -> str:
-    """自定义Base64编码"""
-    length = len(data)
-    remainder = length % 3
-    chunks = []
-    main_length = length - remainder
-    for i in range(0, main_length, 16383):
-        chunks.append(_encode_chunk(data, i, min(i + 16383, main_length)))
-    if remainder == 1:
-        a = data[length - 1]
-        chunks.append(BASE64_CHARS[a >> 2] + BASE64_CHARS[(a << 4) & 63] + "==")
-    elif remainder == 2:
-        a = (data[length - 2] << 8) + data[length - 1]
-        chunks.append(
-            BASE64_CHARS[a >> 10] + BASE64_CHARS[(a >> 4) & 63] + BASE64_CHARS[(a << 2) & 63] + "="
-        )
-    return "".join(chunks)
+    """
+    CRC32 变种计算
+
+    等价于对前 57 个字符做标准 CRC32 (zlib 的 C 实现)。原逐字节查表实现在 Python
+    任意精度整数上运算，结果为 (crc32 - 2^32) ^ 3988292384，这里保持相同的数值。
+    """
+    data = e[:57].encode("latin-1")
+    if not data:
+        return 3988292384
+    return (zlib.crc32(data) - 0x100000000) ^ 3988292384
+
+def encode_utf8(s: str) -> bytes:
+    """
+    将字符串编码为UTF-8字节
+
+    原实现先 quote 再逐个解析 %XX 还原字节，结果恰好就是字符串的 UTF-8 编码。
+    """
+    return s.encode("utf-8")
+
+def b64_encode(data: bytes) -> str:
+    """自定义Base64编码：先做标准Base64编码 (C 实现)，再将字母表逐字节映射为 BASE64_CHARS"""
+    return _b64encode(data).translate(_XHS_B64_TABLE).decode("ascii")
 
 def get_trace_id() -> str:
     """生成请求追踪ID"""
-    return "".join(random.choice("abcdef0123456789") for _ in range(16))
+    return secrets.token_hex(8)
 
 # --- 辅助函数：Playwright 环境下的签名构建 ---
 
-def _build_sign_string(uri: str, data: Optional[Union[Dict, str]] = None, method: str = "POST") -> str:
+# 浏览器端执行的固定脚本，参数通过 evaluate 的 arg 传入
+_GET_B1_JS = "() => window.localStorage.getItem('b1')"
+_MNSV2_JS = "([signStr, md5Str]) => window.mnsv2(signStr, md5Str)"
+# MD5 仅作签名摘要而非安全用途；Python 3.9+ 声明后在启用 FIPS 的 OpenSSL 下也可直接使用
+_MD5_KWARGS = {"usedforsecurity": False} if sys.version_info >= (3, 9) else {}
+
+def _build_sign_string(uri: str, data: Optional[Union[Dict, str, bytes]] = None, method: str = "POST") -> str:
     """构建用于签名的原始字符串"""
     if method.upper() == "POST":
         c = uri
         if data is not None:
             if isinstance(data, dict):
                 c += json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+            elif isinstance(data, bytes):
+                # 已序列化的请求体，直接使用，保证签名与实际发送的内容一致
+                c += data.decode("utf-8")
             elif isinstance(data, str):
                 c += data
         return c
@@ -153,7 +90,7 @@ def _build_sign_string(uri: str, data: Optional[Union[Dict, str]] = None, method
 
 def _md5_hex(s: str) -> str:
     """计算MD5摘要"""
-    return hashlib.md5(s.encode("utf-8")).hexdigest()
+    return hashlib.md5(s.encode("utf-8"), **_MD5_KWARGS).hexdigest()
 
 def _build_xs_payload(x3_value: str, data_type: str = "object") -> str:
     """构建 X-S 载荷"""
@@ -179,42 +116,43 @@ def _build_xs_common(a1: str, b1: str, x_s: str, x_t: str) -> str:
 async def get_b1_from_localstorage(page: Page) -> str:
     """从浏览器 localStorage 获取 b1 参数"""
     try:
-        local_storage = await page.evaluate("() => window.localStorage")
-        return local_storage.get("b1", "")
+        # 只读取 b1 一项，避免把整个 localStorage 序列化回 Python
+        return await page.evaluate(_GET_B1_JS) or ""
     except Exception:
         # 获取失败时返回空字符串，不影响整体流程
         return ""
 
 async def call_mnsv2(page: Page, sign_str: str, md5_str: str) -> str:
     """调用浏览器注入的 mnsv2 函数进行签名计算"""
-    sign_str_escaped = sign_str.replace("\\", "\\\\").replace("'", "\\'").replace("\n", "\\n")
-    md5_str_escaped = md5_str.replace("\\", "\\\\").replace("'", "\\'")
     try:
-        result = await page.evaluate(f"window.mnsv2('{sign_str_escaped}', '{md5_str_escaped}')")
+        # 脚本固定不变，参数由 Playwright 序列化传入，无需手动转义
+        result = await page.evaluate(_MNSV2_JS, [sign_str, md5_str])
         return result if result else ""
     except Exception:
         return ""
 
-async def sign_with_playwright(page: Page, uri: str, data: Optional[Union[Dict, str]] = None, a1: str = "", method: str = "POST") -> Dict[str, Any]:
+async def sign_with_playwright(page: Page, uri: str, data: Optional[Union[Dict, str, bytes]] = None, a1: str = "", method: str = "POST", b1: Optional[str] = None) -> Dict[str, Any]:
     """
     使用 Playwright 浏览器环境生成 API 请求所需的签名头
     
     Args:
         page: Playwright Page 对象
         uri: 请求 URI
-        data: 请求数据
+        data: 请求数据；bytes 表示已序列化为 JSON 的请求体对象
         a1: cookie 中的 a1 字段
         method: 请求方法
+        b1: 调用方缓存的 localStorage b1 值；为 None 时从浏览器读取
         
     Returns:
         包含签名头的字典
     """
-    b1 = await get_b1_from_localstorage(page)
+    if b1 is None:
+        b1 = await get_b1_from_localstorage(page)
     
     sign_str = _build_sign_string(uri, data, method)
     md5_str = _md5_hex(sign_str)
     x3_value = await call_mnsv2(page, sign_str, md5_str)
-    data_type = "object" if isinstance(data, (dict, list)) else "string"
+    data_type = "object" if isinstance(data, (dict, list, bytes)) else "string"
     x_s = _build_xs_payload(x3_value, data_type)
     
     x_t = str(int(time.time() * 1000))